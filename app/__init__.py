@@ -1,14 +1,19 @@
+import atexit
 import logging
 import os
-from collections import deque
+import threading
 
+from cachetools import TTLCache
 from dotenv import load_dotenv
 from flask import Flask
 
 from .config import configure_logging, load_secret_key
 from .routes.views import bp as weather_bp
-from .agents.weather_agent import WeatherAgent
+from .agents.weather_agent import close_http_client
+from .utils import fast_json
 from .utils.async_runner import AsyncRunner
+from .utils.json_provider import OrjsonProvider
+from .utils.ring_buffer import RingBuffer
 
 
 def create_app():
@@ -19,11 +24,22 @@ def create_app():
 
     configure_logging(app)
 
+    # Faster JSON responses when orjson is installed
+    if fast_json.orjson is not None:
+        app.json = OrjsonProvider(app)
+
     # Shared components (singletons)
     app.extensions = getattr(app, 'extensions', {})
     app.extensions['async_runner'] = AsyncRunner()         # background event loop
-    app.extensions['weather_agent'] = WeatherAgent()       # browser_use agent
-    app.extensions['recent_searches'] = deque(maxlen=10)   # simple in-memory cache
+    app.extensions['async_runner'].add_shutdown_hook(close_http_client)
+    atexit.register(app.extensions['async_runner'].stop)   # closes the shared HTTP session
+    app.extensions['weather_agent'] = None                 # browser_use agent, built lazily
+    app.extensions['weather_agent_retry_at'] = 0.0         # monotonic time before which a failed build isn't retried
+    app.extensions['recent_searches'] = RingBuffer(10)     # JSON-encoded WeatherData bytes
+    app.extensions['weather_cache'] = TTLCache(maxsize=256, ttl=300)  # (town, country) -> JSON bytes
+    app.extensions['weather_cache_lock'] = threading.Lock()
+    app.extensions['agent_breaker'] = {'fails': 0, 'open_until': 0.0}  # see views._record_agent_result
+    app.extensions['agent_breaker_lock'] = threading.Lock()
 
     # Blueprints
     app.register_blueprint(weather_bp)
@@ -1,27 +1,117 @@
+import asyncio
 import os
-import json
 import logging
 import re
-from datetime import datetime, timezone
-from typing import Any, Optional, Tuple
+import threading
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Optional, Tuple
 
-import httpx
-from browser_use import Agent, ChatOpenAI
+import aiohttp
+from cachetools import LRUCache
 
-from ..models import WeatherData
+if TYPE_CHECKING:
+    from browser_use import Agent
+
+try:
+    # RE2 matches in linear time, so long agent outputs can't trigger backtracking blowups
+    import re2
+except ImportError:  # pragma: no cover - fall back to the stdlib engine
+    re2 = re
+
+from ..models import WeatherData, now_iso_utc_cached
+from ..utils import fast_json
 
 logger = logging.getLogger(__name__)
 
+# Compiled once at import; used on every /weather request.
+# Input sanitizing stays on stdlib re so its \s matches the str.isspace() table below
+# (RE2's \s is only [\t\n\f\r ]); it only ever sees <= 50 chars.
+_SANITIZE_RE = re.compile(r"[^a-zA-Z\s\-']")
+# str.translate table equivalent to _SANITIZE_RE for ASCII input (the common case)
+_DROP_TABLE = {
+    cp: None for cp in range(0x80)
+    if not (chr(cp).isalpha() or chr(cp).isspace() or chr(cp) in "-'")
+}
+# RE2's \s is only [\t\n\f\r ] and its \d only [0-9], while stdlib re matches their
+# Unicode counterparts (e.g. the U+00A0 no-break spaces common in scraped pages).
+# Spell out the stdlib classes for RE2 so both engines parse the same text the same way.
+if re2 is re:
+    _WS, _DIGIT = r'\s', r'\d'
+else:
+    _WS, _DIGIT = r'\s\v\x{1c}-\x{1f}\x{85}\p{Z}', r'\p{Nd}'
+_NUMBER = rf'{_DIGIT}+(?:\.{_DIGIT}+)?'
+
+# Temperature, wind and humidity in a single alternation so the fallback
+# parser reads the agent output once instead of once per field.
+# Flags are inline ((?i)) so the patterns compile under both re2 and re.
+_FIELDS_RE = re2.compile(
+    rf'(?i)(?P<temp>{_NUMBER})[{_WS}]*°?[{_WS}]*(?P<tunit>[CF])'
+    rf'|wind[:{_WS}]*(?P<wind>{_NUMBER})[{_WS}]*(?P<wunit>mph|kmh|km/h|m/s)(?:[{_WS}]*[NSEW]{{1,2}})?'
+    rf'|humidity[:{_WS}]*(?P<hum>{_DIGIT}+)[{_WS}]*%'
+)
+_NUM_RE = re2.compile(_NUMBER)
+
+# Shared HTTP session for the Open-Meteo fallback (keeps connections/TLS warm)
+_SESSION: Optional[aiohttp.ClientSession] = None
+
+# (town, country) -> (lat, lon); coordinates don't change, so repeat cities skip the geocode hop.
+# Only touched from the AsyncRunner loop thread, so no lock is needed.
+_GEO_CACHE: "LRUCache[Tuple[str, str], Tuple[float, float]]" = LRUCache(maxsize=512)
+
+# Guards lazy WeatherAgent construction in get_agent()
+_AGENT_LOCK = threading.Lock()
+# After a failed WeatherAgent build, don't retry it for this long
+_AGENT_RETRY_AFTER = 30  # seconds
+
+# Longer raw inputs skip the validation cache so it can't be filled with huge keys
+_VALIDATE_CACHE_MAX_LEN = 128
+
+
+def _sanitize_input(text: str) -> str:
+    if not text:
+        return ""
+    # Cap before filtering so oversized payloads cost at most 50 chars of work
+    text = text.strip()[:50]
+    # Keep letters, spaces, hyphens, apostrophes
+    if text.isascii():
+        return text.translate(_DROP_TABLE)
+    return _SANITIZE_RE.sub("", text)
+
+
+@lru_cache(maxsize=1024)
+def _validate_location(town: str, country: str) -> Tuple[bool, str, str, str]:
+    """Pure function of its inputs, so repeat cities are answered from the cache."""
+    if not town or not country:
+        return False, "Both town and country are required", "", ""
+    town_s = _sanitize_input(town)
+    country_s = _sanitize_input(country)
+    if len(town_s) < 2:
+        return False, "Town name must be at least 2 characters", "", ""
+    if len(country_s) < 2:
+        return False, "Country name must be at least 2 characters", "", ""
+    return True, "", town_s, country_s
+
+
+class InvalidLocationError(ValueError):
+    """Raised when the requested town/country is rejected before the agent runs."""
+
 
 class WeatherAgent:
     """AI Agent for fetching weather data using browser automation."""
 
     def __init__(self):
-        self.agent: Optional[Agent] = None
+        self.agent: Optional["Agent"] = None
+        # Bounds concurrent agent runs; the semaphore is created on the AsyncRunner loop on first use
+        self._concurrency = self._load_concurrency()
+        self._sem: Optional[asyncio.Semaphore] = None
         self._initialize_agent()
 
     def _initialize_agent(self):
         try:
+            # Imported here so browser_use/Playwright only load when the agent is used
+            from browser_use import Agent, ChatOpenAI
+
             # Model can be controlled via env; defaults to gpt-4o-mini
             model = os.getenv("BROWSER_USE_MODEL", "gpt-4o-mini")
 
@@ -37,33 +127,34 @@ class WeatherAgent:
             logger.error(f"Failed to initialize weather agent: {e}")
             raise
 
+    @staticmethod
+    def _load_concurrency() -> int:
+        raw = os.getenv("AGENT_CONCURRENCY", "2")
+        try:
+            return max(1, int(raw))
+        except ValueError:
+            logger.warning(f"Invalid AGENT_CONCURRENCY={raw!r}; using 2")
+            return 2
+
     def _sanitize_input(self, text: str) -> str:
-        if not text:
-            return ""
-        # Keep letters, spaces, hyphens, apostrophes
-        sanitized = re.sub(r"[^a-zA-Z\s\-']", "", text.strip())
-        return sanitized[:50]
+        return _sanitize_input(text)
 
     def _validate_location(self, town: str, country: str) -> Tuple[bool, str, str, str]:
-        if not town or not country:
-            return False, "Both town and country are required", "", ""
-        town_s = self._sanitize_input(town)
-        country_s = self._sanitize_input(country)
-        if len(town_s) < 2:
-            return False, "Town name must be at least 2 characters", "", ""
-        if len(country_s) < 2:
-            return False, "Country name must be at least 2 characters", "", ""
-        return True, "", town_s, country_s
+        if len(town or "") > _VALIDATE_CACHE_MAX_LEN or len(country or "") > _VALIDATE_CACHE_MAX_LEN:
+            return _validate_location.__wrapped__(town, country)
+        return _validate_location(town, country)
 
     async def get_weather_data(self, town: str, country: str) -> Optional[WeatherData]:
         """
         Use the browser agent to fetch weather and return a WeatherData object.
         The agent is instructed to return strict JSON to make parsing robust.
+        Raises InvalidLocationError for rejected input (the agent is not run);
+        returns None when the agent ran but produced no usable result.
         """
         ok, msg, town_s, country_s = self._validate_location(town, country)
         if not ok:
             logger.warning(f"Invalid location input: {msg}")
-            return None
+            raise InvalidLocationError(msg)
 
         logger.info(f"Fetching weather data for {town_s}, {country_s}")
 
@@ -81,8 +172,12 @@ class WeatherAgent:
         Do not include explanations or markdown, only valid JSON.
         """
 
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self._concurrency)
+
         try:
-            result = await self.agent.run(task)  # type: ignore[arg-type]
+            async with self._sem:
+                result = await self.agent.run(task)  # type: ignore[arg-type]
         except Exception as e:
             logger.error(f"Agent error: {e}")
             return None
@@ -91,10 +186,13 @@ class WeatherAgent:
             logger.warning(f"No result returned by agent for {town_s}, {country_s}")
             return None
 
-        try:
-            logger.debug(f"Raw agent result (truncated): {str(result)[:2000]}")
-        except Exception:
-            pass
+        if logger.isEnabledFor(logging.DEBUG):
+            try:
+                # Slice before converting so large payloads aren't copied just for a debug line
+                raw = result[:2000] if isinstance(result, (str, bytes, bytearray)) else str(result)[:2000]
+                logger.debug(f"Raw agent result (truncated): {raw}")
+            except Exception:
+                pass
 
         return self._parse_weather_result(result, town_s, country_s)
 
@@ -103,11 +201,16 @@ class WeatherAgent:
         Parse the agent result; prefer JSON, fall back to regex heuristics.
         """
         try:
-            result_str = str(result).strip()
+            # Bytes-like results go straight to the JSON parser; no str copy or strip
+            # needed since leading/trailing whitespace is valid JSON
+            if isinstance(result, (bytes, bytearray, memoryview)):
+                payload = result
+            else:
+                payload = result if isinstance(result, str) else str(result)
 
             # 1) Try JSON first
             try:
-                obj = json.loads(result_str)
+                obj = fast_json.loads(payload)
                 temperature = obj.get("temperature") or "N/A"
                 wind = obj.get("wind") or "N/A"
                 humidity = obj.get("humidity") or "N/A"
@@ -119,28 +222,32 @@ class WeatherAgent:
                     temperature=temperature,
                     wind=wind,
                     humidity=humidity,
-                    timestamp=datetime.now(timezone.utc).isoformat(),
+                    timestamp=now_iso_utc_cached(),
                 )
-            except json.JSONDecodeError:
+            except fast_json.JSONDecodeError:
                 pass
 
-            # 2) Fallback: regex extraction
-            temp_match = re.search(r'(\d+(?:\.\d+)?)\s*°?\s*([CF])', result_str, re.IGNORECASE)
-            temperature = f"{temp_match.group(1)}°{temp_match.group(2).upper()}" if temp_match else "N/A"
-
-            wind_match = re.search(
-                r'wind[:\s]*(\d+(?:\.\d+)?)\s*(mph|kmh|km/h|m/s)(?:\s*[NSEW]{1,2})?',
-                result_str,
-                re.IGNORECASE
-            )
-            wind = f"{wind_match.group(1)} {wind_match.group(2)}" if wind_match else "N/A"
-
-            humidity_match = re.search(r'humidity[:\s]*(\d+)\s*%', result_str, re.IGNORECASE)
-            humidity = f"{humidity_match.group(1)}%" if humidity_match else "N/A"
+            # 2) Fallback: regex extraction (first match of each field wins)
+            if isinstance(payload, str):
+                result_str = payload
+            else:
+                result_str = bytes(payload).decode("utf-8", errors="replace")
+            temperature = wind = humidity = None
+            for m in _FIELDS_RE.finditer(result_str):
+                if m.group("temp") is not None:
+                    if temperature is None:
+                        temperature = f"{m.group('temp')}°{m.group('tunit').upper()}"
+                elif m.group("wind") is not None:
+                    if wind is None:
+                        wind = f"{m.group('wind')} {m.group('wunit')}"
+                elif humidity is None:
+                    humidity = f"{m.group('hum')}%"
+                if temperature and wind and humidity:
+                    break
 
             # Emergency heuristic: grab first 3 numbers
-            if temperature == "N/A" and wind == "N/A" and humidity == "N/A":
-                numbers = re.findall(r'\d+(?:\.\d+)?', result_str)
+            if temperature is None and wind is None and humidity is None:
+                numbers = _NUM_RE.findall(result_str)
                 if len(numbers) >= 3:
                     temperature = f"{numbers[0]}°C"
                     wind = f"{numbers[1]} km/h"
@@ -149,18 +256,65 @@ class WeatherAgent:
             return WeatherData(
                 town=town.title(),
                 country=country.title(),
-                temperature=temperature,
-                wind=wind,
-                humidity=humidity,
-                timestamp=datetime.now(timezone.utc).isoformat(),
+                temperature=temperature or "N/A",
+                wind=wind or "N/A",
+                humidity=humidity or "N/A",
+                timestamp=now_iso_utc_cached(),
             )
         except Exception as e:
             logger.error(f"Error parsing weather result: {e}")
             return None
 
 
+def get_agent(app) -> WeatherAgent:
+    """
+    Return the app's WeatherAgent, building it on first use.
+    Deployments running with USE_AGENT=false never pay for browser_use startup.
+    If the build fails (missing key, browser_use import error, ...), the error is
+    raised and further calls fail fast with RuntimeError for _AGENT_RETRY_AFTER
+    seconds instead of retrying the build under the lock on every request.
+    """
+    agent = app.extensions.get('weather_agent')
+    if agent is not None:
+        return agent
+    with _AGENT_LOCK:
+        agent = app.extensions.get('weather_agent')
+        if agent is None:
+            # Checked under the lock so requests queued behind a failing build fail fast too
+            if app.extensions.get('weather_agent_retry_at', 0.0) > time.monotonic():
+                raise RuntimeError("Weather agent failed to initialize recently; not retrying yet")
+            try:
+                agent = app.extensions['weather_agent'] = WeatherAgent()
+            except Exception:
+                app.extensions['weather_agent_retry_at'] = time.monotonic() + _AGENT_RETRY_AFTER
+                raise
+    return agent
+
+
 # ---------- Zero-dependency API fallback (Open-Meteo) ----------
 
+def _get_session() -> aiohttp.ClientSession:
+    """
+    Return the process-wide ClientSession, creating it on first use.
+    Must be called from the AsyncRunner loop, which owns the session.
+    """
+    global _SESSION
+    if _SESSION is None or _SESSION.closed:
+        _SESSION = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=30),
+            connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300),
+        )
+    return _SESSION
+
+
+async def close_http_client() -> None:
+    """Close the shared ClientSession (registered as an AsyncRunner shutdown hook)."""
+    global _SESSION
+    if _SESSION is not None:
+        await _SESSION.close()
+        _SESSION = None
+
+
 async def get_weather_open_meteo(town: str, country: str) -> Optional[WeatherData]:
     """
     Fallback path that does not rely on the browser agent.
@@ -168,41 +322,46 @@ async def get_weather_open_meteo(town: str, country: str) -> Optional[WeatherDat
     Humidity is not provided in current_weather, so it's set to 'N/A'.
     """
     try:
-        q = f"{town}, {country}"
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            # 1) Geocode
-            georesp = await client.get(
+        session = _get_session()
+
+        # 1) Geocode (cached per town/country)
+        geo_key = (town.lower(), country.lower())
+        coords = _GEO_CACHE.get(geo_key)
+        if coords is None:
+            q = f"{town}, {country}"
+            async with session.get(
                 "https://geocoding-api.open-meteo.com/v1/search",
                 params={"name": q, "count": 1, "language": "en", "format": "json"},
-            )
-            geo = georesp.json()
+            ) as georesp:
+                geo = await georesp.json(loads=fast_json.loads, content_type=None)
             if not geo.get("results"):
                 return None
             r0 = geo["results"][0]
-            lat, lon = r0["latitude"], r0["longitude"]
-
-            # 2) Weather
-            wresp = await client.get(
-                "https://api.open-meteo.com/v1/forecast",
-                params={"latitude": lat, "longitude": lon, "current_weather": True, "windspeed_unit": "kmh"},
-            )
-            w = wresp.json()
-            cur = w.get("current_weather")
-            if not cur:
-                return None
-
-            temperature = f"{cur['temperature']}°C"
-            wind = f"{cur['windspeed']} km/h"
-            humidity = "N/A"
+            coords = _GEO_CACHE[geo_key] = (r0["latitude"], r0["longitude"])
+        lat, lon = coords
+
+        # 2) Weather
+        async with session.get(
+            "https://api.open-meteo.com/v1/forecast",
+            params={"latitude": lat, "longitude": lon, "current_weather": "true", "windspeed_unit": "kmh"},
+        ) as wresp:
+            w = await wresp.json(loads=fast_json.loads, content_type=None)
+        cur = w.get("current_weather")
+        if not cur:
+            return None
 
-            return WeatherData(
-                town=town.title(),
-                country=country.title(),
-                temperature=temperature,
-                wind=wind,
-                humidity=humidity,
-                timestamp=datetime.now(timezone.utc).isoformat(),
-            )
+        temperature = f"{cur['temperature']}°C"
+        wind = f"{cur['windspeed']} km/h"
+        humidity = "N/A"
+
+        return WeatherData(
+            town=town.title(),
+            country=country.title(),
+            temperature=temperature,
+            wind=wind,
+            humidity=humidity,
+            timestamp=now_iso_utc_cached(),
+        )
     except Exception as e:
         logger.error(f"Open-Meteo fallback error: {e}")
         return None
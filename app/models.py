@@ -1,6 +1,27 @@
-from dataclasses import dataclass, asdict
+import threading
+import time
+from dataclasses import dataclass
 from datetime import datetime, timezone
-import json
+
+from .utils import fast_json
+
+# [epoch second, ISO string] of the last formatted timestamp
+_LAST_TS = [0, ""]
+_TS_LOCK = threading.Lock()
+
+
+def now_iso_utc_cached() -> str:
+    """
+    Current UTC time as an ISO-8601 string at one-second resolution.
+    The formatted string is reused for every call within the same second.
+    """
+    t = int(time.time())
+    with _TS_LOCK:
+        if t != _LAST_TS[0]:
+            _LAST_TS[0] = t
+            _LAST_TS[1] = datetime.fromtimestamp(t, timezone.utc).isoformat()
+        return _LAST_TS[1]
+
 
 @dataclass
 class WeatherData:
@@ -12,8 +33,19 @@ class WeatherData:
     humidity: str
     timestamp: str
 
+    def as_dict(self) -> dict:
+        # Flat fields, so a literal dict beats dataclasses.asdict()'s recursive copy
+        return {
+            'town': self.town,
+            'country': self.country,
+            'temperature': self.temperature,
+            'wind': self.wind,
+            'humidity': self.humidity,
+            'timestamp': self.timestamp,
+        }
+
     def to_json(self) -> str:
-        return json.dumps(asdict(self), indent=2)
+        return fast_json.dumps(self.as_dict(), indent=True).decode()
 
     @staticmethod
     def now_iso_utc() -> str:
@@ -1,14 +1,43 @@
 import os
-from dataclasses import asdict
+import time
 from typing import Any, Dict
 
 from flask import Blueprint, current_app, jsonify, render_template, request
 
 from ..models import WeatherData
-from ..agents.weather_agent import get_weather_open_meteo
+from ..agents.weather_agent import InvalidLocationError, get_agent, get_weather_open_meteo
+from ..utils import fast_json
 
 bp = Blueprint('weather', __name__)
 
+# After this many consecutive agent failures, skip the agent for the cooldown period
+# and go straight to Open-Meteo instead of waiting out the agent timeout each time
+AGENT_BREAKER_THRESHOLD = 3
+AGENT_BREAKER_COOLDOWN = 60  # seconds
+
+
+def _agent_breaker_open() -> bool:
+    breaker = current_app.extensions['agent_breaker']
+    with current_app.extensions['agent_breaker_lock']:
+        return breaker['open_until'] > time.monotonic()
+
+
+def _record_agent_result(ok: bool):
+    breaker = current_app.extensions['agent_breaker']
+    with current_app.extensions['agent_breaker_lock']:
+        if ok:
+            breaker['fails'] = 0
+            breaker['open_until'] = 0.0
+            return
+        breaker['fails'] += 1
+        # fails is not reset when opening, so one more failure after the cooldown re-opens it
+        if breaker['fails'] >= AGENT_BREAKER_THRESHOLD:
+            breaker['open_until'] = time.monotonic() + AGENT_BREAKER_COOLDOWN
+            current_app.logger.warning(
+                f"Weather agent failed {breaker['fails']} times in a row; "
+                f"using fallback only for {AGENT_BREAKER_COOLDOWN}s"
+            )
+
 
 @bp.route('/')
 def index():
@@ -26,30 +55,61 @@ def get_weather():
             return jsonify({'error': 'Both town and country are required'}), 400
 
         async_runner = current_app.extensions['async_runner']
-        weather_agent = current_app.extensions['weather_agent']
         recent_searches = current_app.extensions['recent_searches']
+        weather_cache = current_app.extensions['weather_cache']
+        cache_lock = current_app.extensions['weather_cache_lock']
+
+        # Serve repeat lookups from the short-lived cache instead of re-running the agent
+        key = (town.lower(), country.lower())
+        with cache_lock:
+            payload = weather_cache.get(key)
+        if payload is not None:
+            recent_searches.push(payload)
+            body = b'{"success":true,"cached":true,"data":' + payload + b'}'
+            return current_app.response_class(body, mimetype='application/json')
 
         use_agent = os.getenv("USE_AGENT", "true").lower() == "true"
 
         weather_data: WeatherData | None = None
 
-        if use_agent:
+        if use_agent and not _agent_breaker_open():
             # Give Playwright + site navigation enough time
-            weather_data = async_runner.run(
-                weather_agent.get_weather_data(town, country),
-                timeout=120  # seconds
-            )
+            agent_ran = True
+            try:
+                weather_agent = get_agent(current_app)
+                weather_data = async_runner.run(
+                    weather_agent.get_weather_data(town, country),
+                    timeout=120  # seconds
+                )
+            except InvalidLocationError as e:
+                # Rejected input: the agent never ran, so it doesn't count against the breaker
+                agent_ran = False
+                current_app.logger.info(f"Weather agent skipped: {e}")
+            except TimeoutError as e:
+                current_app.logger.warning(f"Weather agent timed out: {e}")
+            except Exception as e:
+                current_app.logger.error(f"Weather agent unavailable: {e}")
+            if agent_ran:
+                _record_agent_result(weather_data is not None)
 
         if not weather_data:
             # Fallback to Open-Meteo (no API key)
-            weather_data = async_runner.run(
-                get_weather_open_meteo(town, country),
-                timeout=60
-            )
+            try:
+                weather_data = async_runner.run(
+                    get_weather_open_meteo(town, country),
+                    timeout=60
+                )
+            except TimeoutError as e:
+                current_app.logger.warning(f"Open-Meteo fallback timed out: {e}")
 
         if weather_data:
-            recent_searches.appendleft(weather_data)
-            return jsonify({'success': True, 'data': asdict(weather_data)})
+            # Stored pre-serialized so /recent and cache hits only stitch bytes together
+            payload = fast_json.dumps(weather_data.as_dict())
+            with cache_lock:
+                weather_cache[key] = payload
+            recent_searches.push(payload)
+            body = b'{"success":true,"data":' + payload + b'}'
+            return current_app.response_class(body, mimetype='application/json')
 
         return jsonify({
             'success': False,
@@ -64,10 +124,8 @@ def get_weather():
 @bp.route('/recent', methods=['GET'])
 def get_recent():
     recent_searches = current_app.extensions['recent_searches']
-    return jsonify({
-        'success': True,
-        'data': [asdict(x) for x in list(recent_searches)]
-    })
+    body = b'{"success":true,"data":[' + b','.join(recent_searches.snapshot()) + b']}'
+    return current_app.response_class(body, mimetype='application/json')
 
 
 @bp.errorhandler(404)
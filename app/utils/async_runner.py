@@ -1,7 +1,10 @@
 import asyncio
+import logging
 import threading
-from concurrent.futures import Future
-from typing import Any, Coroutine, Optional
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Callable, Coroutine, List, Optional
+
+logger = logging.getLogger(__name__)
 
 
 class AsyncRunner:
@@ -11,6 +14,7 @@ class AsyncRunner:
     """
     def __init__(self):
         self._loop = asyncio.new_event_loop()
+        self._shutdown_hooks: List[Callable[[], Awaitable[Any]]] = []
         self._thread = threading.Thread(target=self._run_loop, daemon=True)
         self._thread.start()
 
@@ -19,9 +23,32 @@ class AsyncRunner:
         self._loop.run_forever()
 
     def run(self, coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None):
+        """
+        Run coro on the background loop and block until it finishes.
+        With a timeout, the coroutine is cancelled on the loop when it expires
+        (so e.g. a browser session is torn down) and TimeoutError is raised.
+        """
+        if timeout is not None:
+            coro = asyncio.wait_for(coro, timeout=timeout)
         future: Future = asyncio.run_coroutine_threadsafe(coro, self._loop)
-        return future.result(timeout=timeout)
+        try:
+            # Grace period lets the in-loop cancellation finish first
+            return future.result(timeout=None if timeout is None else timeout + 5)
+        except (asyncio.TimeoutError, FutureTimeoutError) as e:
+            future.cancel()
+            raise TimeoutError(f"Coroutine did not finish within {timeout}s") from e
+
+    def add_shutdown_hook(self, hook: Callable[[], Awaitable[Any]]):
+        """Register a coroutine function to await on the loop before it stops."""
+        self._shutdown_hooks.append(hook)
 
     def stop(self):
+        if not self._loop.is_running():
+            return
+        for hook in self._shutdown_hooks:
+            try:
+                self.run(hook(), timeout=2)
+            except Exception as e:
+                logger.warning(f"AsyncRunner shutdown hook failed: {e}")
         self._loop.call_soon_threadsafe(self._loop.stop)
         self._thread.join(timeout=2)
@@ -0,0 +1,27 @@
+from typing import Any
+
+from flask.json.provider import JSONProvider
+
+from . import fast_json
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    Flask JSON provider backed by orjson.
+    Responses are built straight from the encoded bytes, skipping the
+    str -> UTF-8 round trip of the default provider.
+    Dataclasses are serialized natively, so views can pass them as-is.
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return fast_json.orjson.dumps(obj, default=str).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return fast_json.orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            fast_json.orjson.dumps(obj, default=str),
+            mimetype="application/json",
+        )
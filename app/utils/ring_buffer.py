@@ -0,0 +1,25 @@
+import threading
+from typing import Any, List
+
+
+class RingBuffer:
+    """
+    Fixed-size, thread-safe ring of the most recent items.
+    Pushing past capacity overwrites the oldest entry.
+    """
+    def __init__(self, size: int = 10):
+        self._size = size
+        self._buf: List[Any] = [None] * size
+        self._i = 0
+        self._lock = threading.Lock()
+
+    def push(self, item: Any):
+        with self._lock:
+            self._buf[self._i] = item
+            self._i = (self._i + 1) % self._size
+
+    def snapshot(self) -> List[Any]:
+        """Return the stored items, newest first."""
+        with self._lock:
+            items = [self._buf[(self._i - 1 - k) % self._size] for k in range(self._size)]
+        return [x for x in items if x is not None]
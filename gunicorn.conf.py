@@ -0,0 +1,20 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Usage: gunicorn run:app  (settings below are picked up automatically)
+bind = f"{os.getenv('FLASK_HOST', '127.0.0.1')}:{os.getenv('FLASK_PORT', 5000)}"
+
+# One worker by default: recent searches, the response cache, the agent circuit
+# breaker and the browser_use agent all live in process memory, so every extra
+# worker gets its own copy of each. Scale with threads; requests mostly block
+# on the agent/HTTP I/O, which releases the GIL.
+workers = int(os.getenv('GUNICORN_WORKERS', 1))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+
+# Keep OFF: each worker must build its own app, AsyncRunner loop thread and HTTP session.
+# Preloading would create them in the master and fork a dead loop thread into every worker.
+preload_app = False
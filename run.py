@@ -1,9 +1,10 @@
 import os
 from app import create_app
 
-def main():
-    app = create_app()
+# Module-level app for WSGI servers: `gunicorn run:app` (see gunicorn.conf.py)
+app = create_app()
 
+def main():
     host = os.getenv('FLASK_HOST', '127.0.0.1')
     port = int(os.getenv('FLASK_PORT', 5000))
     debug = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
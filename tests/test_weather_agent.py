@@ -0,0 +1,23 @@
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("aiohttp")
+pytest.importorskip("cachetools")
+
+from app.agents.weather_agent import WeatherAgent
+
+
+def _parse(text):
+    # _parse_weather_result doesn't touch the browser agent, so skip __init__
+    agent = object.__new__(WeatherAgent)
+    data = agent._parse_weather_result(text, "london", "uk")
+    return data.temperature, data.wind, data.humidity
+
+
+def test_fallback_parse_handles_no_break_spaces():
+    text = "Temp 70 °F, wind 8 mph, humidity 40 %"
+    assert _parse(text) == ("70°F", "8 mph", "40%")
+
+
+def test_fallback_parse_no_break_space_before_celsius():
+    assert _parse("Currently 18 °C") == ("18°C", "N/A", "N/A")